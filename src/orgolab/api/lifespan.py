@@ -6,6 +6,7 @@ from fastapi import FastAPI
 from orgo import Computer
 
 from orgolab.domain.config import Settings
+from orgolab.infra.loop_monitor import LoopLagMonitor
 
 load_dotenv()
 
@@ -28,4 +29,19 @@ async def lifespan(app: FastAPI):
     app.state.settings = settings
     app.state.computer = computer
 
+    # Watch for blocking work on the event loop
+    monitor = None
+    if settings.loop_lag_ms > 0:
+        monitor = LoopLagMonitor(threshold=settings.loop_lag_ms / 1000)
+        monitor.start()
+    app.state.loop_monitor = monitor
+
     yield
+
+    if monitor:
+        await monitor.stop()
+
+    # Drop queued prompt calls; running threads wind down via their tokens
+    from orgolab.core.prompt_pool import shutdown_executor
+
+    shutdown_executor()
@@ -1,11 +1,14 @@
-from typing import Any, Dict
+import json
+from collections import Counter
+from typing import Any, Dict, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
-from pydantic import BaseModel, HttpUrl
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Response
+from pydantic import BaseModel, Field, HttpUrl
 
+from orgolab.domain.models import Run
+from orgolab.infra.store import create_batch, get_batch, get_run, get_runs, update_run
 from orgolab.infra.store import create_run as store_create_run
-from orgolab.infra.store import get_run, update_run
 
 router = APIRouter()
 
@@ -16,6 +19,12 @@ class RunRequest(BaseModel):
     context: dict[str, Any] | None = None
     seconds_per_frame: float = 0.1
     success: list[str] | None = None
+    profile: bool = False
+
+
+class BatchRequest(BaseModel):
+    runs: list[RunRequest] = Field(min_length=1)
+    max_per_origin: int | None = Field(default=None, ge=1)
 
 
 @router.post("/runs")
@@ -27,6 +36,7 @@ async def create_run(request: RunRequest, background_tasks: BackgroundTasks, req
         intent=request.intent,
         success=request.success,
         context=request.context,
+        profile=request.profile,
     )
 
     # Get settings and computer from app state
@@ -42,19 +52,50 @@ async def create_run(request: RunRequest, background_tasks: BackgroundTasks, req
     return {"id": str(run.id)}
 
 
+@router.post("/runs/batch")
+async def create_run_batch(request: BatchRequest, background_tasks: BackgroundTasks, req: Request) -> Dict[str, Any]:
+    """Create many runs at once and schedule them with a per-origin limit."""
+    settings = req.app.state.settings
+    computer = req.app.state.computer
+    # A batch may tighten the process-wide origin limit, never loosen it
+    max_per_origin = min(request.max_per_origin or settings.max_runs_per_origin, settings.max_runs_per_origin)
+
+    batch, batch_runs = await create_batch(
+        [
+            {
+                "url": str(r.url),
+                "spf": r.seconds_per_frame,
+                "intent": r.intent,
+                "success": r.success,
+                "context": r.context,
+                "profile": r.profile,
+            }
+            for r in request.runs
+        ],
+        max_per_origin=max_per_origin,
+    )
+
+    # Import here to avoid circular dependency
+    from orgolab.core.scheduler import run_batch
+
+    background_tasks.add_task(run_batch, batch_runs, computer, cfg=settings, max_per_origin=max_per_origin)
+
+    return {"id": str(batch.id), "run_ids": [str(run_id) for run_id in batch.run_ids]}
+
+
 @router.post("/tests", include_in_schema=False)
 async def create_test_compat(request: RunRequest, background_tasks: BackgroundTasks, req: Request) -> Dict[str, str]:
     """Legacy endpoint for compatibility."""
     return await create_run(request, background_tasks, req)
 
 
-@router.get("/runs/{run_id}")
-async def get_run_status(run_id: UUID) -> Dict[str, Any]:
-    """Get run status and details."""
-    run = await get_run(run_id)
-    if not run:
-        raise HTTPException(status_code=404, detail="Run not found")
+def _run_snapshot(run: Run) -> Tuple[int, bytes]:
+    """Serialized status body for *run*, rebuilt only when its version moves."""
+    cached = run._snapshot
+    if cached and cached[0] == run.version:
+        return cached
 
+    version = run.version
     result = run.dict_json()
     if run.log_path:
         result["log_url"] = f"/artifacts/{run.id}/ffmpeg.log"
@@ -63,6 +104,54 @@ async def get_run_status(run_id: UUID) -> Dict[str, Any]:
     result["looped"] = run.looped
     result["outcome"] = run.outcome
     result["artifacts"] = run.artifact_files or []
+    run._snapshot = (version, json.dumps(result).encode())
+    return run._snapshot
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.get("/runs/{run_id}")
+async def get_run_status(run_id: UUID, req: Request) -> Response:
+    """Get run status and details.
+
+    Supports ``If-None-Match``: the ETag changes whenever ``update_run`` is
+    called for the run, otherwise a 304 is returned.
+    """
+    run = await get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    version, body = _run_snapshot(run)
+    etag = f'"{run.id}-{version}"'
+    if _etag_matches(req.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch_status(batch_id: UUID) -> Dict[str, Any]:
+    """Aggregate status and outcome counts over every run in a batch."""
+    batch = await get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    batch_runs = await get_runs(batch.run_ids)
+    statuses = Counter(run.status for run in batch_runs)
+    outcomes = Counter(run.outcome for run in batch_runs if run.outcome)
+    finished = sum(statuses[s] for s in ("SUCCEEDED", "FAILED", "ERROR"))
+
+    result = batch.dict_json()
+    result["total"] = len(batch_runs)
+    result["finished"] = finished
+    result["done"] = finished == len(batch_runs)
+    result["statuses"] = dict(statuses)
+    result["outcomes"] = dict(outcomes)
+    result["poll_interval"] = 2
     return result
 
 
@@ -74,3 +163,17 @@ async def accept_run(run_id: UUID):
     run.accepted = True
     await update_run(run)
     return {"accepted": True}
+
+
+@router.get("/stats")
+async def get_stats(req: Request) -> Dict[str, Any]:
+    """Process-wide counters for the prompt pool, LLM limiters and event loop."""
+    # Import here to avoid circular dependency
+    from orgolab.core.prompt_pool import prompt_stats
+    from orgolab.core.rate_limit import limiter_stats
+
+    result: Dict[str, Any] = {"prompt_pool": prompt_stats(), "llm_limiters": limiter_stats()}
+    monitor = getattr(req.app.state, "loop_monitor", None)
+    if monitor:
+        result["loop_lag"] = monitor.stats()
+    return result
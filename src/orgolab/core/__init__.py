@@ -2,9 +2,11 @@ from . import replay
 from .action_log import write_log
 from .event_capture import extract_actions
 from .executor import run_test
+from .scheduler import run_batch
 
 __all__ = [
     "run_test",
+    "run_batch",
     "extract_actions",
     "write_log",
     "replay"
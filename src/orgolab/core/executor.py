@@ -1,6 +1,8 @@
 import asyncio
-import base64
+import functools
 import os
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -9,10 +11,22 @@ from orgo import Computer
 
 from orgolab.core.artifacts import build_all
 from orgolab.core.event_capture import extract_actions
-from orgolab.core.images import guess_ext, walk_and_save_images
+from orgolab.core.images import (
+    DECODE_BUFFER_BYTES,
+    image_digest,
+    save_base64_image,
+    walk_and_save_images,
+)
+from orgolab.core.memory import MemoryBudget
+from orgolab.core.prompt_pool import CancelToken, PromptQueueTimeout, run_prompt, wait_with_deadline
+from orgolab.core.rate_limit import call_with_backoff, get_limiter
+from orgolab.core.replay.verify import frame_hashes
+from orgolab.core.timeline import write_timeline
 from orgolab.domain.config import Settings
 from orgolab.domain.models import Run
-from orgolab.infra.artifacts import FFmpegFailure, build_video
+from orgolab.infra.artifacts import FFmpegFailure, build_video, frame_durations, plan_sprite
+from orgolab.infra.frames import FrameSegment, FrameWriter
+from orgolab.infra.profiler import SamplingProfiler
 from orgolab.infra.store import update_run
 
 # Load environment variables
@@ -36,36 +50,76 @@ def _contains_task_complete(msg) -> bool:
 
 
 async def run_test(run: Run, pc: Computer, *, cfg: Settings) -> None:
-    try:
-        # Update status to RUNNING
+    token = CancelToken()
+    budget = MemoryBudget(cfg.max_run_screenshot_mb * 2**20, trace=cfg.trace_memory)
+    profiler = None
+    if run.profile:
+        loop_thread = threading.get_ident()
+
+        def profiled_threads():
+            # The pool thread is only ours until the prompt call returns
+            return {"event-loop": loop_thread, "prompt": None if token.finished else token.thread_id}
+
+        profiler = SamplingProfiler(profiled_threads)
+        profiler.start()
+    async def mark_running() -> None:
+        # The run stays PENDING while its prompt waits for a pool thread
         run.status = "RUNNING"
         run.started_at = datetime.now(timezone.utc)
         await update_run(run)
 
-        # Run with timeout
-        await asyncio.wait_for(
-            _run_test_inner(run, pc, cfg),
-            timeout=cfg.max_run_seconds
-        )
+    try:
+        # Run with timeout, counted from when the prompt gets a pool thread;
+        # the wait for that thread has its own, separate limit
+        with budget:
+            await wait_with_deadline(
+                asyncio.ensure_future(_run_test_inner(run, pc, cfg, token, budget)),
+                token,
+                timeout=cfg.max_run_seconds,
+                queue_timeout=cfg.max_queue_seconds,
+                on_started=mark_running,
+            )
 
+    except PromptQueueTimeout:
+        token.cancel()
+        run.status = "ERROR"
+        run.error = f"No prompt worker became free within {cfg.max_queue_seconds} seconds"
+        run.finished_at = datetime.now(timezone.utc)
+        await update_run(run)
     except asyncio.TimeoutError:
         # Update run with timeout failure
+        token.cancel()
         run.status = "ERROR"
         run.error = f"Test timed out after {cfg.max_run_seconds} seconds"
         run.finished_at = datetime.now(timezone.utc)
         await update_run(run)
     except Exception as exc:
         # Update run with failure
+        token.cancel()
         run.status = "ERROR"
         run.error = str(exc)
         run.finished_at = datetime.now(timezone.utc)
         await update_run(run)
+    finally:
+        run.peak_screenshot_mb = round(budget.peak_bytes / 2**20, 1)
+        if budget.trace:
+            run.peak_memory_mb = round(budget.traced_peak_bytes / 2**20, 1)
+        if profiler:
+            profiler.stop()
+            run_dir = Path(f"{cfg.artifacts_dir}/{run.id}")
+            run_dir.mkdir(parents=True, exist_ok=True)
+            written = await asyncio.to_thread(profiler.write, run_dir)
+            run.artifact_files = (run.artifact_files or []) + written
+        await update_run(run)
 
 
-async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
+async def _run_test_inner(
+    run: Run, pc: Computer, cfg: Settings, token: CancelToken, budget: MemoryBudget
+) -> None:
     """Inner test execution logic."""
     ACTION_CAP = cfg.action_cap
     actions: list[dict] = []
+    action_frames: list[int] = []   # first frame captured after each action
     saw_task_complete = False
     # Create artifacts directory
     run_dir = Path(f"{cfg.artifacts_dir}/{run.id}")
@@ -75,8 +129,21 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
     # Use provided computer instance
     computer = pc
 
-    # Initialize frame counter
-    frame_count = 0
+    # Append-only frame container; its index records each frame's arrival
+    # time (s since start) and is the only frame counter we need
+    frames = FrameWriter(frames_dir)
+    frames_dropped = 0
+
+    # Shared per-model LLM limiter; waits are charged to this run
+    limiter = get_limiter(cfg.claude_model, cfg)
+
+    def note_throttled(seconds: float) -> None:
+        run.throttled_seconds = round(run.throttled_seconds + seconds, 3)
+    started = time.monotonic()
+    last_kept: float | None = None
+    handled: set[bytes] = set()   # image_digest of screenshots the callback saved or dropped
+    turn_open = False   # tool_use seen, no limiter token taken for the next model call yet
+    touched = False     # the agent has acted on the desktop; prompt must not be retried
 
     def progress_callback(event_type: str, event_data):
         """
@@ -84,7 +151,22 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
         • Pipe tool_result objects through event_capture.extract_actions()
           so actions[] is filled even when screenshots aren't saved.
         """
-        nonlocal frame_count, saw_task_complete, actions   # keep actions list!
+        nonlocal saw_task_complete, actions   # keep actions list!
+        nonlocal frames_dropped, last_kept, turn_open, touched
+
+        # 0 — run already abandoned: persist nothing, end the SDK session
+        token.bind_session()
+        token.raise_if_cancelled()
+        budget.sample()
+
+        # 0b — one limiter token per model turn. A turn's tool_use events are
+        #      followed by one tool_result per tool, then the next model call,
+        #      so the first tool_result of each turn takes the token for it
+        if event_type == "tool_use":
+            turn_open = touched = True
+        elif event_type == "tool_result" and turn_open:
+            turn_open = False
+            note_throttled(limiter.acquire(token.sleep))
 
         # 1 — task_complete fast-exit
         if event_type == "tool_result" and _contains_task_complete(event_data):
@@ -93,18 +175,26 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
 
         # 2 — harvest actionable events
         if event_type == "tool_result":
-            actions.extend(extract_actions(event_data))
+            new_actions = extract_actions(event_data)
+            actions.extend(new_actions)
+            action_frames.extend([len(frames)] * len(new_actions))
 
             # 3 — save any base64 screenshot found in the same payload
+            #     (left intact: the SDK may still send this block to the model)
+            #     Frames faster than seconds_per_frame are dropped before decoding.
             for block in event_data.get("content", []):
                 if block.get("type") == "image":
                     src = block.get("source", {})
                     if src.get("type") == "base64":
-                        raw = base64.b64decode(src["data"])
-                        ext = guess_ext(raw)
-                        (frames_dir / f"frame_{frame_count:04d}.{ext}").write_bytes(raw)
-                        frame_count += 1
-
+                        handled.add(image_digest(src["data"]))
+                        budget.hold(len(src["data"]))
+                        now = time.monotonic() - started
+                        if last_kept is not None and now - last_kept < run.seconds_per_frame:
+                            frames_dropped += 1
+                            continue
+                        with budget.holding(DECODE_BUFFER_BYTES):
+                            save_base64_image(src["data"], frames, ts=now)
+                        last_kept = now
 
     # Run the test
     initial_prompt = (
@@ -115,22 +205,48 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
     )
 
     ### Phase 1 – initial prompt ############################################
-    response1 = await asyncio.to_thread(
-        computer.prompt,
-        initial_prompt,
-        model=cfg.claude_model,
-        api_key=os.getenv("ANTHROPIC_API_KEY"),
-        callback=progress_callback,
-        thinking_enabled=cfg.thinking_enabled,
-    )
+    try:
+        response1 = await run_prompt(
+            functools.partial(
+                call_with_backoff,
+                computer.prompt,
+                limiter=limiter,
+                # A retry replays the whole agent session, so only before it acted
+                can_retry=lambda: not touched,
+                max_retries=cfg.llm_max_retries,
+                sleep=token.sleep,
+                on_wait=note_throttled,
+            ),
+            initial_prompt,
+            token=token,
+            max_workers=cfg.prompt_workers,
+            model=cfg.claude_model,
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            callback=progress_callback,
+            thinking_enabled=cfg.thinking_enabled,
+        )
+
+        budget.sample()
 
-    walk_and_save_images(response1, frames_dir, [frame_count])
+        # Persists each screenshot the callback never saw. Blocks the
+        # callback already kept or throttled are skipped, so nothing is
+        # decoded or written twice.
+        # These frames carry no arrival time, so they get the nominal cadence.
+        with budget.holding(DECODE_BUFFER_BYTES):
+            walk_and_save_images(response1, frames, skip=handled)
+    finally:
+        frames.close()
+    frame_count = len(frames)
 
     # After `_dump_response_images(...)`
     for msg in (response1 if isinstance(response1, list) else []):
         if isinstance(msg, dict) and msg.get("type") == "tool_result":
             actions.extend(extract_actions(msg))
 
+    # Nothing below needs the conversation; don't pin it through video build
+    del response1
+    budget.sample()
+
     # --- Evaluate success criteria ---------------------------------------
     if run.outcome is None:             # only if task_complete() didn't decide
         assertions = run.success or []
@@ -140,9 +256,6 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
         failures = [pat for pat in assertions if not re.search(pat, page_text, re.I)]
         run.outcome = "ASSERTION_FAIL" if failures else "SUCCESS"
 
-    # Update frame count
-    frame_count = len(list(frames_dir.glob("frame_*.*")))
-
     # Guard against silent failures
     if frame_count == 0:
         raise RuntimeError("Screenshot stream returned zero frames")
@@ -152,10 +265,14 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
         if run.outcome is None:
             run.outcome = "DESIGN_FAIL"
 
-    # Build video from frames
+    # Build video (and thumbnail sprite in the same ffmpeg pass) from frames,
+    # showing each frame for as long as it was actually on screen
+    with FrameSegment(frames_dir) as segment:
+        durations = frame_durations(segment.times(), run.seconds_per_frame)
+    sprite = plan_sprite(frames_dir)
     try:
         video_path = await asyncio.to_thread(
-            build_video, frames_dir, fps=1.0 / run.seconds_per_frame
+            build_video, frames_dir, sprite=sprite, durations=durations
         )
     except FFmpegFailure as fferr:
         run.status = "ERROR"
@@ -164,12 +281,25 @@ async def _run_test_inner(run: Run, pc: Computer, cfg: Settings) -> None:
         run.finished_at = datetime.now(timezone.utc)
         await update_run(run)
         return
+    budget.sample()
 
     # Log frame count
-    print(f"[run {run.id}] saved {frame_count} frame(s)")
+    print(f"[run {run.id}] saved {frame_count} frame(s), throttled {frames_dropped}")
+
+    # Fingerprint the frame after each batch of steps so replays can verify the screen
+    last_frame = frame_count - 1
+    step_frames = [min(f, last_frame) for f in action_frames] + [last_frame]
+    hashes = await asyncio.to_thread(frame_hashes, frames_dir, step_frames)
 
     # Generate all artifacts using unified builder
     run.artifact_files = build_all(run_dir, actions, run.outcome or 'FAILED')
+    run.artifact_files.append(
+        write_timeline(
+            run_dir, actions, action_frames, durations, sprite,
+            hashes=hashes, hash_tolerance=cfg.replay_hash_tolerance,
+        )
+    )
+    run.artifact_files.append(sprite["file"])
 
     # Update run with success/failure based on outcome
     run.video_path = str(video_path)
@@ -1,8 +1,18 @@
 """Image processing utilities for OrgoLab."""
 
 import base64
-from pathlib import Path
-from typing import Any, Dict, List
+import hashlib
+import io
+from typing import AbstractSet, Any, Dict, Iterator, List, Optional
+
+from PIL import Image
+
+from orgolab.infra.frames import FrameWriter
+
+# Base64 characters decoded per write; a multiple of 4 so chunks never split a quantum.
+DECODE_CHUNK_CHARS = 4 * 64 * 1024
+# Decoded bytes alive at once in save_base64_image: the header chunk plus the current one.
+DECODE_BUFFER_BYTES = 2 * (DECODE_CHUNK_CHARS // 4 * 3)
 
 
 def guess_ext(buf: bytes) -> str:
@@ -14,39 +24,95 @@ def guess_ext(buf: bytes) -> str:
     raise ValueError("Unknown image format")
 
 
-def save_base64_blocks(blocks: List[Dict[str, Any]], dest_dir: Path, prefix: str = "frame") -> int:
+def _decoded_chunks(data: str, head: bytes) -> Iterator[bytes]:
+    yield head
+    for start in range(DECODE_CHUNK_CHARS, len(data), DECODE_CHUNK_CHARS):
+        yield base64.b64decode(data[start:start + DECODE_CHUNK_CHARS])
+
+
+def save_base64_image(data: str, frames: FrameWriter, ts: Optional[float] = None) -> int:
+    """Decode *data* into the run's frame container chunk by chunk.
+
+    Only one chunk of decoded bytes is alive at a time, so a screenshot never
+    exists as both the full base64 string and a full bytes copy. Returns the
+    new frame's index.
+    """
+    head = base64.b64decode(data[:DECODE_CHUNK_CHARS])
+    ext = guess_ext(head)
+    if frames.ext is not None and ext != frames.ext:
+        # Containers hold one format (see infra.frames); re-encode the odd frame
+        return frames.append([_reencode(data, frames.ext)], frames.ext, ts)
+    return frames.append(_decoded_chunks(data, head), ext, ts)
+
+
+def _reencode(data: str, ext: str) -> bytes:
+    """Decode a base64 image and encode it as *ext* (``png`` or ``jpg``)."""
+    out = io.BytesIO()
+    with Image.open(io.BytesIO(base64.b64decode(data))) as im:
+        if ext == "jpg":
+            im.convert("RGB").save(out, "JPEG", quality=90)
+        else:
+            im.save(out, "PNG")
+    return out.getvalue()
+
+
+def image_digest(data: str) -> bytes:
+    """Stable fingerprint of a base64 payload, hashed chunk by chunk.
+
+    Used to recognise the same screenshot across the progress callback and
+    the returned conversation: the SDK may hand each its own parsed copy,
+    so object identity can't be relied on.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for start in range(0, len(data), DECODE_CHUNK_CHARS):
+        h.update(data[start:start + DECODE_CHUNK_CHARS].encode("ascii"))
+    return h.digest()
+
+
+def _persist_block(
+    block: Dict[str, Any], frames: FrameWriter, skip: AbstractSet[bytes] = frozenset()
+) -> bool:
+    """Save a base64 image block.
+
+    Blocks whose ``image_digest`` is in *skip* were already handled
+    elsewhere and are left untouched.
+    """
+    src = block.get("source", {})
+    if src.get("type") != "base64" or (skip and image_digest(src["data"]) in skip):
+        return False
+    save_base64_image(src["data"], frames)
+    return True
+
+
+def save_base64_blocks(blocks: List[Dict[str, Any]], frames: FrameWriter) -> int:
     """Extract and save all base64 images from a list of blocks.
 
     Returns the number of images saved.
     """
     counter = 0
-    existing = len([p for ext in ("png", "jpg") for p in dest_dir.glob(f"{prefix}_*.{ext}")])
-
     for block in blocks:
-        if block.get("type") == "image":
-            src = block.get("source", {})
-            if src.get("type") == "base64":
-                raw = base64.b64decode(src["data"])
-                ext = guess_ext(raw)
-                (dest_dir / f"{prefix}_{existing + counter:04d}.{ext}").write_bytes(raw)
-                counter += 1
-
+        if block.get("type") == "image" and _persist_block(block, frames):
+            counter += 1
     return counter
 
 
-def walk_and_save_images(msg: Any, dest_dir: Path, counter_ref: List[int]) -> None:
-    """Recursively walk a message structure and save all base64 images."""
+def walk_and_save_images(
+    msg: Any, frames: FrameWriter, skip: AbstractSet[bytes] = frozenset()
+) -> int:
+    """Recursively walk a message structure and save all base64 images.
+
+    *skip* holds ``image_digest``s of screenshots already handled (saved or
+    deliberately dropped) by the progress callback; those are not decoded
+    again. Returns the number of images saved.
+    """
+    saved = 0
     if isinstance(msg, dict):
-        if msg.get("type") == "image":
-            src = msg.get("source", {})
-            if src.get("type") == "base64":
-                raw = base64.b64decode(src["data"])
-                ext = guess_ext(raw)
-                (dest_dir / f"frame_{counter_ref[0]:04d}.{ext}").write_bytes(raw)
-                counter_ref[0] += 1
+        if msg.get("type") == "image" and _persist_block(msg, frames, skip):
+            saved += 1
         for v in msg.values():
             if isinstance(v, (dict, list)):
-                walk_and_save_images(v, dest_dir, counter_ref)
+                saved += walk_and_save_images(v, frames, skip)
     elif isinstance(msg, list):
         for item in msg:
-            walk_and_save_images(item, dest_dir, counter_ref)
+            saved += walk_and_save_images(item, frames, skip)
+    return saved
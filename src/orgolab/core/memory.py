@@ -0,0 +1,108 @@
+"""Per-run screenshot ceiling plus an optional tracemalloc peak.
+
+Two separate figures per run:
+
+• Screenshot payload — the base64 bytes of every screenshot the run
+  received, plus its decode buffer in flight. Only the run's own data is
+  counted, so this is what ``MAX_RUN_SCREENSHOT_MB`` caps.
+• Traced memory — with ``TRACE_MEMORY`` on, tracemalloc is sampled at each
+  callback and phase boundary. tracemalloc traces the whole process, so the
+  peak is growth since the run started *including concurrent runs*; it is
+  reported, never enforced.
+"""
+
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+_started_tracing = False
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    pass
+
+
+def _acquire_tracing() -> None:
+    global _trace_users, _started_tracing
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _trace_users += 1
+
+
+def _release_tracing() -> None:
+    global _trace_users, _started_tracing
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class MemoryBudget:
+    """Accounts one run's screenshot payload and samples traced memory.
+
+    ``hold()`` / ``release()`` are thread-safe; the prompt thread holds bytes
+    as screenshots arrive. A ceiling of 0 only records the peak. ``sample()``
+    is a no-op unless *trace* is set.
+    """
+
+    def __init__(self, ceiling_bytes: int = 0, *, trace: bool = False) -> None:
+        self.ceiling_bytes = ceiling_bytes
+        self.trace = trace
+        self.held_bytes = 0
+        self.peak_bytes = 0
+        self.traced_peak_bytes = 0
+        self._baseline: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MemoryBudget":
+        if self.trace:
+            _acquire_tracing()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._baseline is not None:
+            self.sample()
+            self._baseline = None
+            _release_tracing()
+
+    def hold(self, nbytes: int) -> None:
+        """Count *nbytes* more screenshot data; raise if over the ceiling."""
+        with self._lock:
+            self.held_bytes += nbytes
+            used = self.held_bytes
+            if used > self.peak_bytes:
+                self.peak_bytes = used
+        if self.ceiling_bytes and used > self.ceiling_bytes:
+            raise MemoryBudgetExceeded(
+                f"Run screenshot data {used / 2**20:.1f} MiB exceeded ceiling "
+                f"{self.ceiling_bytes / 2**20:.1f} MiB"
+            )
+
+    def release(self, nbytes: int) -> None:
+        with self._lock:
+            self.held_bytes = max(0, self.held_bytes - nbytes)
+
+    @contextmanager
+    def holding(self, nbytes: int) -> Iterator[None]:
+        """Hold *nbytes* for the duration of the block (e.g. a decode buffer)."""
+        self.hold(nbytes)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+    def sample(self) -> int:
+        """Record traced-memory growth over the run's baseline."""
+        if self._baseline is None or not tracemalloc.is_tracing():
+            return 0
+        used = max(0, tracemalloc.get_traced_memory()[0] - self._baseline)
+        if used > self.traced_peak_bytes:
+            self.traced_peak_bytes = used
+        return used
@@ -0,0 +1,212 @@
+"""Bounded thread pool for blocking ``computer.prompt`` calls.
+
+``asyncio.wait_for`` can abandon a coroutine but not the thread it is waiting
+on, so each prompt call carries a ``CancelToken``.  The run's progress callback
+checks the token and raises ``RunCancelled`` once the run has been given up on.
+That alone does not end a session on the orgo hosted agent: websocket-client
+hands callback exceptions to ``on_error`` and keeps reading.  So the callback
+also binds the live websocket to the token, and cancelling closes it, which
+makes the SDK's ``run_forever`` return and frees the pool thread.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+log = logging.getLogger("orgolab.prompt")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Guarded by _stats_lock; touched from both the event loop and pool threads.
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"active": 0, "orphaned": 0, "reclaimed": 0}
+
+
+class RunCancelled(Exception):
+    """Raised inside a prompt thread after its run timed out or failed."""
+
+
+class PromptQueueTimeout(asyncio.TimeoutError):
+    """The prompt call never got a pool thread within the queue timeout."""
+
+
+def _find_session(max_depth: int = 6) -> Any:
+    """Best-effort handle on the orgo SDK's live websocket session.
+
+    The hosted-agent provider invokes the progress callback from its
+    ``on_message(ws, message)`` handler, and that ``ws`` argument is the only
+    reference to the session. Walk up from the caller looking for it; any
+    object with ``close`` and ``keep_running`` (a ``WebSocketApp``) will do.
+    Returns None for providers without one (the direct Anthropic loop simply
+    unwinds on ``RunCancelled``).
+    """
+    frame = sys._getframe(1)
+    for _ in range(max_depth):
+        if frame is None:
+            break
+        ws = frame.f_locals.get("ws")
+        if ws is not None and hasattr(ws, "close") and hasattr(ws, "keep_running"):
+            return ws
+        frame = frame.f_back
+    return None
+
+
+class CancelToken:
+    """Thread-safe, one-way cancellation flag shared with a prompt thread."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.finished = False   # set by the pool thread when the call returns
+        self.thread_id: Optional[int] = None   # pool thread running the call
+        self.started = asyncio.Event()   # set on the loop once a pool thread picks the call up
+        self.session: Any = None   # SDK websocket, bound from the prompt thread
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Trip the token and close the bound SDK session, if any.
+
+        Closing may wait on the network, so it happens on a helper thread
+        rather than on the caller (usually the event loop).
+        """
+        if self._event.is_set():
+            return
+        self._event.set()
+        if self.session is not None:
+            threading.Thread(target=self.close_session, name="orgo-session-close", daemon=True).start()
+
+    def bind_session(self) -> None:
+        """Remember the SDK session this callback runs under; call from the callback."""
+        if self.session is None:
+            self.session = _find_session()
+            if self.session is not None and self.cancelled:
+                self.close_session()
+
+    def close_session(self) -> None:
+        session = self.session
+        if session is None:
+            return
+        try:
+            session.close()
+        except Exception:
+            log.warning("failed to close prompt session", exc_info=True)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            self.close_session()
+            raise RunCancelled("run was cancelled")
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep up to *seconds*, raising ``RunCancelled`` as soon as the token trips."""
+        if self._event.wait(seconds):
+            raise RunCancelled("run was cancelled")
+
+
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Return the process-wide prompt pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orgo-prompt")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Drop queued prompt calls and release the pool (called on app shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def prompt_stats() -> Dict[str, int]:
+    """Snapshot of pool counters.
+
+    ``orphaned`` counts prompt threads still running when their run was
+    abandoned; ``reclaimed`` counts those that have since exited.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["outstanding"] = stats["orphaned"] - stats["reclaimed"]
+    return stats
+
+
+def _call(
+    fn: Callable[..., Any], token: CancelToken, loop: asyncio.AbstractEventLoop, args, kwargs
+) -> Any:
+    token.thread_id = threading.get_ident()
+    loop.call_soon_threadsafe(token.started.set)
+    with _stats_lock:
+        _stats["active"] += 1
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with _stats_lock:
+            _stats["active"] -= 1
+            token.finished = True
+            if token.cancelled:
+                _stats["reclaimed"] += 1
+
+
+async def run_prompt(
+    fn: Callable[..., Any], *args: Any, token: CancelToken, max_workers: int, **kwargs: Any
+) -> Any:
+    """Run ``fn(*args, **kwargs)`` on the prompt pool, honouring *token*.
+
+    ``token.started`` is set once a pool thread begins the call, so callers
+    can tell queueing time apart from running time. If the awaiting task is
+    cancelled (e.g. by ``asyncio.wait_for``), the token is tripped so the
+    thread can wind down on its next callback.
+    """
+    loop = asyncio.get_running_loop()
+    cfut = get_executor(max_workers).submit(_call, fn, token, loop, args, kwargs)
+    try:
+        return await asyncio.wrap_future(cfut)
+    except asyncio.CancelledError:
+        with _stats_lock:
+            token.cancel()
+            # A call still sitting in the queue is simply dropped.
+            if not cfut.cancel() and not token.finished:
+                _stats["orphaned"] += 1
+        raise
+
+
+async def wait_with_deadline(
+    task: "asyncio.Future[Any]",
+    token: CancelToken,
+    *,
+    timeout: float,
+    queue_timeout: float,
+    on_started: Optional[Callable[[], Awaitable[None]]] = None,
+) -> Any:
+    """Await *task*, giving it *timeout* seconds from when its prompt starts.
+
+    Until a pool thread picks the prompt up, the run is only queued: that
+    wait is bounded separately by *queue_timeout* (``PromptQueueTimeout``),
+    so runs stuck behind busy or orphaned threads still end. *on_started*
+    is awaited once the prompt is running. Raises ``asyncio.TimeoutError``
+    like ``asyncio.wait_for``.
+    """
+    started = asyncio.ensure_future(token.started.wait())
+    try:
+        await asyncio.wait({task, started}, timeout=queue_timeout, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        started.cancel()
+    if not token.started.is_set() and not task.done():
+        # Cancelling trips the token and drops the still-queued call
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise PromptQueueTimeout(f"no prompt worker free within {queue_timeout} seconds")
+    if on_started is not None and token.started.is_set():
+        await on_started()
+    return await asyncio.wait_for(task, timeout)
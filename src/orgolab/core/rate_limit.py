@@ -0,0 +1,170 @@
+"""Process-wide LLM call limiter shared by every concurrent run.
+
+One token bucket per model caps model calls per minute across all prompt
+threads. When the provider still answers 429 / overloaded, the bucket is
+paused for everybody so runs don't retry in lockstep. A failing call is only
+retried (after a jittered, exponential delay) while its caller says that is
+safe; a prompt session that already drove the desktop is not replayed.
+
+``clock`` / ``sleep`` are injectable so the limiter can be driven on a fake
+clock against a local stub provider (see ``tests/llm_stub.py``).
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from orgolab.domain.config import Settings
+
+Sleep = Callable[[float], Any]
+
+# Anthropic answers 429 for rate limits and 529 when overloaded
+RATE_LIMIT_STATUSES = (429, 529)
+RATE_LIMIT_ERRORS = ("RateLimitError", "OverloadedError")
+
+# Refill is float arithmetic; a token this close to whole counts as whole,
+# otherwise a tiny wait can vanish into the clock's rounding and repeat forever
+_TOKEN_EPSILON = 1e-9
+
+_limiters: Dict[str, "TokenBucket"] = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        per_minute: float,
+        burst: int = 1,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Sleep = time.sleep,
+    ) -> None:
+        """*per_minute* <= 0 disables limiting (but backoff pauses still apply)."""
+        self.rate = per_minute / 60.0
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._clock = clock
+        self.sleep = sleep
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.throttled_seconds = 0.0
+        self.rate_limit_errors = 0
+
+    def _refill(self, now: float) -> None:
+        # No credit accrues while paused, so callers don't burst out together
+        if self.rate > 0 and now >= self._paused_until:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, sleep: Optional[Sleep] = None) -> float:
+        """Block until a call may proceed; return the seconds spent waiting."""
+        sleep = sleep or self.sleep
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0 and self.rate <= 0:
+                    break
+                if wait <= 0 and self._tokens >= 1 - _TOKEN_EPSILON:
+                    self._tokens = max(self._tokens - 1, 0.0)
+                    break
+                if wait <= 0:
+                    wait = (1 - self._tokens) / self.rate
+            sleep(wait)
+            waited += wait
+        self.record_throttled(waited)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for *seconds* (provider pushed back)."""
+        with self._lock:
+            self.rate_limit_errors += 1
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def record_throttled(self, seconds: float) -> None:
+        with self._lock:
+            self.throttled_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "per_minute": round(self.rate * 60, 2),
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "rate_limit_errors": self.rate_limit_errors,
+        }
+
+
+def get_limiter(model: str, cfg: Settings) -> TokenBucket:
+    """Return the shared bucket for *model*, creating it from *cfg* on first use."""
+    with _limiters_lock:
+        if model not in _limiters:
+            per_minute = cfg.llm_rate_limits.get(model, cfg.llm_requests_per_minute)
+            _limiters[model] = TokenBucket(per_minute, cfg.llm_burst)
+        return _limiters[model]
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        return {model: bucket.stats() for model, bucket in _limiters.items()}
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    return (
+        getattr(exc, "status_code", None) in RATE_LIMIT_STATUSES
+        or type(exc).__name__ in RATE_LIMIT_ERRORS
+    )
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_backoff(
+    fn: Callable[..., Any],
+    *args: Any,
+    limiter: TokenBucket,
+    can_retry: Callable[[], bool] = lambda: True,
+    max_retries: int = 2,
+    base_delay: float = 2.0,
+    max_delay: float = 60.0,
+    sleep: Optional[Sleep] = None,
+    on_wait: Optional[Callable[[float], None]] = None,
+    **kwargs: Any,
+) -> Any:
+    """Call ``fn(*args, **kwargs)`` once a token is free.
+
+    On a rate-limit error every caller of *limiter* is paused. The call is
+    then retried only if ``can_retry()`` is true, otherwise the error is
+    re-raised. *on_wait* receives every stretch of time spent throttled
+    (bucket waits and backoff sleeps alike).
+    """
+    sleep = sleep or limiter.sleep
+    for attempt in range(max_retries + 1):
+        waited = limiter.acquire(sleep)
+        if on_wait and waited:
+            on_wait(waited)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            if not is_rate_limit_error(exc):
+                raise
+            # Everyone backs off for the shared pause; a retry then adds its
+            # own full-jitter delay so the retries don't land in lockstep
+            pause = _retry_after(exc) or base_delay
+            limiter.pause(pause)
+            if attempt == max_retries or not can_retry():
+                raise
+            delay = pause + random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            sleep(delay)
+            limiter.record_throttled(delay)
+            if on_wait:
+                on_wait(delay)
+
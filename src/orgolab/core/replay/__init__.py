@@ -1,7 +1,11 @@
 from .orgo import generate_orgo_script
 from .sandbox import generate_sandbox_snippet
+from .verify import dhash, frame_hashes, verify_replay
 
 __all__ = [
     "generate_orgo_script",
     "generate_sandbox_snippet",
+    "dhash",
+    "frame_hashes",
+    "verify_replay",
 ]
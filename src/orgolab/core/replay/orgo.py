@@ -2,19 +2,52 @@ from pathlib import Path
 
 ORGO_TEMPLATE = '''\
 from orgo import Computer
-import os, json, time
+from PIL import Image
+import os, json, sys, time
 
 pc = Computer(project_id=os.getenv("ORGO_PROJECT_ID"), api_key=os.getenv("ORGO_API_KEY"))
 with open("{LOG}", "r") as f:
     steps = json.load(f)["actions"]
 
-for step in steps:
+# Recorded screen hashes, on the last step before each screenshot
+# (absent for runs recorded before timelines)
+expected, tolerance = {}, 10
+if os.path.exists("{TIMELINE}"):
+    with open("{TIMELINE}", "r") as f:
+        timeline = json.load(f)
+    tolerance = timeline.get("phash", {}).get("tolerance", tolerance)
+    expected = {e["index"]: int(e["phash"], 16) for e in timeline["actions"] if e.get("phash")}
+
+
+def dhash(image, size=8):
+    px = list(image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            bits = (bits << 1) | (px[row * (size + 1) + col] > px[row * (size + 1) + col + 1])
+    return bits
+
+
+def matches(i, attempts=3, settle=0.5):
+    for _ in range(attempts):
+        time.sleep(settle)
+        if bin(dhash(pc.screenshot()) ^ expected[i]).count("1") <= tolerance:
+            return True
+    return False
+
+
+for i, step in enumerate(steps):
     name = step["name"]
     args = step.get("args", {})
     getattr(pc, name)(**args)
+    if i in expected and not matches(i):
+        print(f"Replay diverged from the recording at step {i} ({name})")
+        sys.exit(1)
+
+print(f"Replayed {len(steps)} step(s); screen matched the recording")
 '''
 
-def generate_orgo_script(run_dir: Path, log_file: str) -> str:
+def generate_orgo_script(run_dir: Path, log_file: str, timeline_file: str = "timeline.json") -> str:
     path = run_dir / "orgo_replay.py"
-    path.write_text(ORGO_TEMPLATE.replace("{LOG}", log_file))
+    path.write_text(ORGO_TEMPLATE.replace("{LOG}", log_file).replace("{TIMELINE}", timeline_file))
     return path.name
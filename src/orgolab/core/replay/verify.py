@@ -0,0 +1,80 @@
+"""Screenshot-hash checks that a replay still matches its recording.
+
+Each recorded screenshot is fingerprinted with a 64-bit difference hash
+(dHash) and attached to the last step before it, so a batch of actions
+taken between screenshots is checked once, after its final step. During
+replay the live screen is hashed the same way; a Hamming distance above
+the tolerance is a divergence.
+"""
+
+import io
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from PIL import Image
+
+from orgolab.infra.frames import FrameSegment
+
+HASH_ALGORITHM = "dhash64"
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair."""
+    small = image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            right = px[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def frame_hashes(frames_dir: Path, indices: Iterable[int]) -> Dict[int, int]:
+    """dHash of each requested recorded frame, read from the run's container."""
+    hashes: Dict[int, int] = {}
+    with FrameSegment(frames_dir) as frames:
+        for i in sorted(set(indices)):
+            if 0 <= i < len(frames):
+                with Image.open(io.BytesIO(frames[i])) as im:
+                    hashes[i] = dhash(im)
+    return hashes
+
+
+def verify_replay(
+    pc: Any,
+    actions: List[Dict[str, Any]],
+    timeline: Dict[str, Any],
+    *,
+    tolerance: Optional[int] = None,
+    settle: float = 0.5,
+    attempts: int = 3,
+) -> Optional[int]:
+    """Replay *actions* on *pc*, checking the screen after each hashed step.
+
+    *timeline* is a run's timeline.json. Only the last step before each
+    recorded screenshot carries a hash; the others are not checked. Each check polls up to *attempts* screenshots, *settle*
+    seconds apart, to let the UI catch up. Returns the index of the first
+    diverging step, or None if the whole replay matched.
+    """
+    if tolerance is None:
+        tolerance = timeline.get("phash", {}).get("tolerance", 10)
+    expected = {e["index"]: int(e["phash"], 16) for e in timeline["actions"] if e.get("phash")}
+
+    for i, step in enumerate(actions):
+        getattr(pc, step["name"])(**step.get("args", {}))
+        if i not in expected:
+            continue
+        for _ in range(attempts):
+            time.sleep(settle)
+            if hamming(dhash(pc.screenshot()), expected[i]) <= tolerance:
+                break
+        else:
+            return i
+    return None
@@ -0,0 +1,47 @@
+"""Schedule batches of runs with a per-origin concurrency limit."""
+
+import asyncio
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from orgo import Computer
+
+from orgolab.core.executor import run_test
+from orgolab.domain.config import Settings
+from orgolab.domain.models import Run
+
+# origin -> slots shared by every batch in the process, sized from
+# ``max_runs_per_origin``; guards the origin however many batches target it
+_origin_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def origin_of(url) -> str:
+    """Return ``scheme://host[:port]`` for a URL (``HttpUrl`` or str)."""
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def origin_slots(origin: str, cfg: Settings) -> asyncio.Semaphore:
+    """Return the process-wide semaphore for *origin*, creating it on first use."""
+    if origin not in _origin_slots:
+        _origin_slots[origin] = asyncio.Semaphore(cfg.max_runs_per_origin)
+    return _origin_slots[origin]
+
+
+async def run_batch(runs: List[Run], pc: Computer, *, cfg: Settings, max_per_origin: int) -> None:
+    """Execute *runs* concurrently under the process-wide per-origin limit.
+
+    Every batch shares ``cfg.max_runs_per_origin`` slots per origin. A batch's
+    *max_per_origin* can only tighten that for its own runs; it never lets a
+    batch exceed the shared limit. ``run_test`` records its own failures on
+    the run, so one broken run never cancels the rest of the batch.
+    """
+    batch_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def _one(run: Run) -> None:
+        origin = origin_of(run.target_url)
+        mine = batch_slots.setdefault(origin, asyncio.Semaphore(max_per_origin))
+        async with mine, origin_slots(origin, cfg):
+            await run_test(run, pc, cfg=cfg)
+
+    await asyncio.gather(*(_one(run) for run in runs))
@@ -0,0 +1,63 @@
+"""Action → frame → video-offset index written next to actions.json."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TIMELINE_NAME = "timeline.json"
+
+
+def write_timeline(
+    run_dir: Path,
+    actions: List[Dict[str, Any]],
+    action_frames: List[int],
+    durations: List[float],
+    sprite: Optional[Dict[str, Any]] = None,
+    hashes: Optional[Dict[int, int]] = None,
+    hash_tolerance: int = 10,
+) -> str:
+    """Write timeline.json and return its filename.
+
+    ``action_frames[i]`` is the index of the first frame captured after
+    ``actions[i]``, i.e. the screen that shows its effect. Actions with no
+    later frame point at the last one. ``durations`` holds each frame's
+    on-screen time in the video, from which offsets are derived. ``hashes``
+    maps frame index to its dHash (see ``replay.verify``) so replays can
+    check the screen. The agent batches actions between screenshots, so a
+    frame's hash goes only on the last action that maps to it; the check
+    then runs once per recorded screenshot, after the whole batch.
+    """
+    frame_count = len(durations)
+    offsets = [0.0]
+    for d in durations:
+        offsets.append(offsets[-1] + d)
+    last = max(frame_count - 1, 0)
+    frames = [min(action_frames[i] if i < len(action_frames) else last, last) for i in range(len(actions))]
+    entries = []
+    for i, act in enumerate(actions):
+        frame = frames[i]
+        entry = {
+            "index": i,
+            "name": act["name"],
+            "ts": act.get("ts"),
+            "frame": frame,
+            "offset": round(offsets[frame], 3),
+        }
+        if sprite:
+            entry["tile"] = frame // sprite["frame_step"]
+        ends_batch = i + 1 == len(frames) or frames[i + 1] != frame
+        if hashes and frame in hashes and ends_batch:
+            entry["phash"] = f"{hashes[frame]:016x}"
+        entries.append(entry)
+
+    data = {
+        "frame_count": frame_count,
+        "duration": round(offsets[-1], 3),
+        "frame_offsets": [round(o, 3) for o in offsets[:-1]],
+        "sprite": sprite,
+        "phash": {"algorithm": "dhash64", "tolerance": hash_tolerance} if hashes else None,
+        "actions": entries,
+    }
+    path = run_dir / TIMELINE_NAME
+    path.write_text(json.dumps(data, separators=(",", ":")))
+    return path.name
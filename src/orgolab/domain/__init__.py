@@ -6,9 +6,10 @@ from .constants import (
     OUTCOMES,
     RUN_STATUSES,
 )
-from .models import Run
+from .models import Batch, Run
 
 __all__ = [
+    "Batch",
     "Run",
     "Settings",
     "ARTIFACTS_DIR",
@@ -3,6 +3,16 @@ import os
 from pydantic import BaseModel, Field
 
 
+def _rate_limits_from_env() -> dict[str, int]:
+    """Parse ``LLM_RATE_LIMITS="model-a=40,model-b=100"`` (calls per minute)."""
+    limits = {}
+    for item in os.getenv("LLM_RATE_LIMITS", "").split(","):
+        if "=" in item:
+            model, per_minute = item.split("=", 1)
+            limits[model.strip()] = int(per_minute)
+    return limits
+
+
 class Settings(BaseModel):
     """Centralized configuration for OrgoLab."""
 
@@ -12,13 +22,40 @@ class Settings(BaseModel):
 
     # Execution settings
     max_run_seconds: int = Field(default_factory=lambda: int(os.getenv("MAX_RUN_SECONDS", "180")))
+    max_queue_seconds: int = Field(
+        default_factory=lambda: int(os.getenv("MAX_QUEUE_SECONDS", "600"))  # wait for a prompt worker
+    )
     max_steps: int = 40
     action_cap: int = 40  # matches dashboard badge
+    max_run_screenshot_mb: int = Field(
+        default_factory=lambda: int(os.getenv("MAX_RUN_SCREENSHOT_MB", "0"))  # 0 = unlimited
+    )
+    trace_memory: bool = Field(
+        default_factory=lambda: os.getenv("TRACE_MEMORY", "").lower() in ("1", "true", "yes")
+    )
+    loop_lag_ms: int = Field(
+        default_factory=lambda: int(os.getenv("LOOP_LAG_MS", "100"))  # 0 = disabled
+    )
+    prompt_workers: int = Field(default_factory=lambda: int(os.getenv("PROMPT_WORKERS", "8")))
+    max_runs_per_origin: int = Field(
+        default_factory=lambda: int(os.getenv("MAX_RUNS_PER_ORIGIN", "2"))
+    )
 
     # Model settings
     claude_model: str = "claude-3-7-sonnet-20250219"
     thinking_enabled: bool = True
 
+    # LLM rate limiting (shared by all runs; per-model overrides win)
+    llm_requests_per_minute: int = Field(
+        default_factory=lambda: int(os.getenv("LLM_REQUESTS_PER_MINUTE", "50"))  # 0 = unlimited
+    )
+    llm_rate_limits: dict[str, int] = Field(default_factory=_rate_limits_from_env)
+    llm_burst: int = 5
+    llm_max_retries: int = 2
+
+    # Replay verification: max dHash bit difference still counted as a match
+    replay_hash_tolerance: int = 10
+
     # Display settings
     display_width: int = 1024
     display_height: int = 768
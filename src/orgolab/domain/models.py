@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Literal, Optional, Tuple
 from uuid import UUID
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, PrivateAttr
 
 
 class Run(BaseModel):
@@ -22,6 +22,25 @@ class Run(BaseModel):
     context: dict | None = None              # creds / seed data / flags
     outcome: Literal["SUCCESS", "ASSERTION_FAIL", "DESIGN_FAIL"] | None = None
     artifact_files: list[str] | None = None  # filenames only
+    batch_id: Optional[UUID] = None          # set when submitted via /runs/batch
+    peak_screenshot_mb: Optional[float] = None   # screenshot data received by the run
+    peak_memory_mb: Optional[float] = None   # process-wide tracemalloc peak, with TRACE_MEMORY
+    profile: bool = False                    # write a sampling profile artifact
+    version: int = 0                         # bumped by store.update_run
+    throttled_seconds: float = 0.0           # time spent waiting on the LLM limiter
+
+    # (version, serialized GET /runs/{id} body); lives and dies with the run
+    _snapshot: Optional[Tuple[int, bytes]] = PrivateAttr(default=None)
+
+    def dict_json(self):
+        return self.model_dump(mode="json")
+
+
+class Batch(BaseModel):
+    id: UUID
+    run_ids: list[UUID]
+    max_per_origin: int
+    created_at: datetime
 
     def dict_json(self):
         return self.model_dump(mode="json")
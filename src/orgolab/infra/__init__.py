@@ -1,9 +1,10 @@
 from .artifacts import FFmpegFailure, build_video
 from .ffmpeg import ensure_ffmpeg
-from .store import create_run, get_run, update_run
+from .store import create_batch, create_run, get_batch, get_run, get_runs, update_run
 
 __all__ = [
     "create_run", "get_run", "update_run",
+    "create_batch", "get_batch", "get_runs",
     "build_video", "FFmpegFailure",
     "ensure_ffmpeg"
 ]
@@ -2,12 +2,25 @@
 Handles video assembly. Uses a portable ffmpeg binary via ffmpeg_util.
 """
 
+import io
+import math
 import subprocess
+import tempfile
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 import ffmpeg
+from PIL import Image
 
 from orgolab.infra.ffmpeg import ensure_ffmpeg
+from orgolab.infra.frames import FrameSegment
+
+SPRITE_NAME = "sprite.jpg"
+SPRITE_TILE_WIDTH = 160
+SPRITE_MAX_TILES = 100
+
+# image2pipe needs the codec up front; a container holds a single format
+_PIPE_CODECS = {"png": "png", "jpg": "mjpeg"}
 
 
 class FFmpegFailure(RuntimeError):
@@ -16,42 +29,173 @@ class FFmpegFailure(RuntimeError):
         self.log_path = log_path
 
 
-def build_video(frames_dir: Path, fps: float = 10.0) -> Path:
-    """Stitch screenshot frames into video.mp4 using ffmpeg.
+def plan_sprite(frames_dir: Path) -> Dict[str, Any]:
+    """Lay out a thumbnail sprite sheet for the frames in *frames_dir*.
 
-    Accepts .png or .jpg, whichever the first frame uses.
+    Every ``frame_step``-th frame becomes one tile, row-major, so frame ``n``
+    lives in tile ``n // frame_step``. At most SPRITE_MAX_TILES tiles are used.
+    """
+    with FrameSegment(frames_dir) as frames:
+        if not len(frames):
+            raise RuntimeError(f"No frames found in {frames_dir}")
+        frame_count = len(frames)
+        with Image.open(io.BytesIO(frames[0])) as im:
+            width, height = im.size
+    tile_height = max(2, round(SPRITE_TILE_WIDTH * height / width / 2) * 2)
+
+    step = math.ceil(frame_count / SPRITE_MAX_TILES)
+    tiles = math.ceil(frame_count / step)
+    columns = min(tiles, 10)
+    return {
+        "file": SPRITE_NAME,
+        "frame_step": step,
+        "tiles": tiles,
+        "columns": columns,
+        "rows": math.ceil(tiles / columns),
+        "tile_width": SPRITE_TILE_WIDTH,
+        "tile_height": tile_height,
+    }
+
+
+def frame_durations(times: List[Optional[float]], default: float) -> List[float]:
+    """Turn per-frame arrival times into on-screen durations.
+
+    A frame lasts until the next one arrived. Frames without a known arrival
+    time (or whose successor has none), and the last frame, get *default*.
     """
-    frames = sorted(frames_dir.glob("frame_*.*"))
-    if not frames:
+    durations = []
+    for i, t in enumerate(times):
+        nxt = times[i + 1] if i + 1 < len(times) else None
+        if t is None or nxt is None or nxt <= t:
+            durations.append(default)
+        else:
+            durations.append(nxt - t)
+    return durations
+
+
+def _write_concat_list(frames: FrameSegment, durations: List[float], list_path: Path) -> None:
+    """ffmpeg concat-demuxer script giving each frame its own duration.
+
+    Entries point into the segment file through the ``subfile`` protocol, so
+    ffmpeg reads each image in place instead of from an extracted file.
+    """
+    segment = str(frames.segment_path.resolve()).replace("'", "'\\''")
+
+    def entry(i: int) -> str:
+        start, end = frames.span(i)
+        return f"file 'subfile,,start,{start},end,{end},,:{segment}'"
+
+    lines = ["ffconcat version 1.0"]
+    for i, duration in enumerate(durations):
+        lines += [entry(i), f"duration {duration:.6f}"]
+    # The demuxer ignores the final duration unless the last file is repeated
+    lines.append(entry(len(durations) - 1))
+    list_path.write_text("\n".join(lines) + "\n")
+
+
+def build_video(
+    frames_dir: Path,
+    fps: float = 10.0,
+    sprite: Optional[Dict[str, Any]] = None,
+    durations: Optional[List[float]] = None,
+) -> Path:
+    """Stitch the frames in *frames_dir*'s container into video.mp4 using ffmpeg.
+
+    With *durations* (seconds per frame, see ``frame_durations``) that vary,
+    the video is variable-rate and time-accurate, read via the concat
+    demuxer. When they are all equal (e.g. no arrival times were recorded)
+    or absent, frames are streamed from the mmap'd container over image2pipe
+    at a constant rate instead. The container holds one image format (see
+    ``infra.frames``), which both paths rely on. When a *sprite* layout from ``plan_sprite`` is given, the
+    thumbnail sheet is rendered in the same ffmpeg pass from a split of the
+    decoded frames.
+    """
+    with FrameSegment(frames_dir) as frames, tempfile.TemporaryDirectory() as tmp:
+        return _build_video(frames, fps, sprite, durations, Path(tmp))
+
+
+def _build_video(
+    frames: FrameSegment,
+    fps: float,
+    sprite: Optional[Dict[str, Any]],
+    durations: Optional[List[float]],
+    tmp_dir: Path,
+) -> Path:
+    frames_dir = frames.frames_dir
+    if not len(frames):
         raise RuntimeError(f"No frames found in {frames_dir}")
 
-    first_ext = frames[0].suffix  # ".png" or ".jpg"
-    input_pattern = str(frames_dir / f"frame_%04d{first_ext}")
+    if durations and len(set(durations)) == 1:
+        # Constant cadence: no per-frame timing to carry, stream it instead
+        fps = 1.0 / durations[0]
+        durations = None
+    output_opts: Dict[str, Any] = {"pix_fmt": "yuv420p"}
+    if durations:
+        durations = (durations + [durations[-1]] * len(frames))[:len(frames)]
+        # Scratch only: entries use absolute paths, so it needn't sit in frames/
+        list_path = tmp_dir / "frames.ffconcat"
+        _write_concat_list(frames, durations, list_path)
+        output_opts["vsync"] = "vfr"
 
     output_path = frames_dir.parent / "video.mp4"
     ffmpeg_exe = ensure_ffmpeg()
 
     try:
         # Get the command that would be run
-        stream = (
-            ffmpeg
-            .input(input_pattern, framerate=fps)
-            .output(str(output_path), pix_fmt="yuv420p")
-            .overwrite_output()
-        )
-        cmd = stream.compile(cmd=ffmpeg_exe)
-
-        # Run it manually to capture stderr
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
+        if durations:
+            source = ffmpeg.input(
+                str(list_path), format="concat", safe=0, protocol_whitelist="file,subfile"
+            )
+        else:
+            source = ffmpeg.input(
+                "pipe:", format="image2pipe", framerate=fps, vcodec=_PIPE_CODECS[frames.ext(0)]
+            )
+        if sprite is None:
+            stream = source.output(str(output_path), **output_opts)
+        else:
+            split = source.filter_multi_output("split")
+            video_src, thumb_src = split[0], split[1]
+            sheet = (
+                thumb_src
+                .filter("framestep", sprite["frame_step"])
+                .filter("scale", sprite["tile_width"], sprite["tile_height"])
+                .filter("tile", f"{sprite['columns']}x{sprite['rows']}")
+            )
+            stream = ffmpeg.merge_outputs(
+                video_src.output(str(output_path), **output_opts),
+                sheet.output(str(frames_dir.parent / sprite["file"]), vframes=1),
+            )
+        cmd = stream.overwrite_output().compile(cmd=ffmpeg_exe)
+
+        # Run it manually to capture stderr; spool it to a file so a chatty
+        # ffmpeg can never block while we are still feeding it frames
+        with tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL if durations else subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=err,
+            )
+            if not durations:
+                try:
+                    for frame in frames:
+                        proc.stdin.write(frame)
+                except BrokenPipeError:
+                    pass   # ffmpeg bailed out; its log says why
+                finally:
+                    proc.stdin.close()
+            returncode = proc.wait()
+            err.seek(0)
+            stderr = err.read().decode(errors="replace")
+
+        if returncode != 0:
             # Save full log for debugging
             log_path = frames_dir.parent / "ffmpeg.log"
             with open(log_path, "w") as f:
-                f.write(result.stderr)
+                f.write(stderr)
 
             # Include the first few stderr lines for easier diagnosis
-            snippet = result.stderr.splitlines()[:10]
+            snippet = stderr.splitlines()[:10]
             raise FFmpegFailure("FFmpeg failed:\n" + "\n".join(snippet), log_path)
 
     except Exception as e:
@@ -0,0 +1,165 @@
+"""
+Packed, append-only frame container.
+
+Each run keeps its screenshots in two files inside ``frames/``:
+
+• ``frames.seg`` — the encoded images (PNG/JPEG) back to back.
+• ``frames.idx`` — one fixed-size record per frame: offset, length,
+  arrival time (NaN when unknown) and extension.
+
+A container holds a single image format, fixed by its first frame, so
+ffmpeg can read every frame with one decoder.
+
+Writers only ever append; readers mmap the segment. Frame counts come from
+the index, never from a directory scan.
+
+Export frames as ordinary image files with:
+
+    python -m orgolab.infra.frames artifacts/<run-id>/frames --out /tmp/frames [-i 0 -i 5]
+"""
+
+import argparse
+import math
+import mmap
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+SEGMENT_NAME = "frames.seg"
+INDEX_NAME = "frames.idx"
+
+_RECORD = struct.Struct("<QId4s")   # offset, length, arrival time, ext
+
+
+class FrameWriter:
+    """Appends frames to a run's container. Safe to share between threads."""
+
+    def __init__(self, frames_dir: Path) -> None:
+        frames_dir.mkdir(parents=True, exist_ok=True)
+        self.frames_dir = frames_dir
+        self._seg = open(frames_dir / SEGMENT_NAME, "ab")
+        self._idx = open(frames_dir / INDEX_NAME, "ab")
+        self._count = self._idx.tell() // _RECORD.size
+        self._lock = threading.Lock()
+        # Format of every frame in the container; None until the first append
+        self.ext: Optional[str] = None
+        if self._count:
+            with open(frames_dir / INDEX_NAME, "rb") as f:
+                self.ext = _RECORD.unpack(f.read(_RECORD.size))[3].rstrip(b"\0").decode()
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, chunks: Iterable[bytes], ext: str, ts: Optional[float] = None) -> int:
+        """Append one encoded image given as byte chunks; return its frame index.
+
+        *ext* must match the container's format (see ``self.ext``).
+        """
+        with self._lock:
+            if self.ext is None:
+                self.ext = ext
+            elif ext != self.ext:
+                raise ValueError(f"container holds {self.ext} frames, got {ext}")
+            # Start from the real end: a failed append may have left a partial tail
+            self._seg.seek(0, 2)
+            offset = self._seg.tell()
+            for chunk in chunks:
+                self._seg.write(chunk)
+            length = self._seg.tell() - offset
+            self._idx.write(_RECORD.pack(offset, length, math.nan if ts is None else ts, ext.encode()))
+            self._count += 1
+            return self._count - 1
+
+    def flush(self) -> None:
+        with self._lock:
+            self._seg.flush()
+            self._idx.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._seg.close()
+            self._idx.close()
+
+
+class FrameSegment:
+    """Read-only, mmap-backed view of a run's frame container."""
+
+    def __init__(self, frames_dir: Path) -> None:
+        self.frames_dir = frames_dir
+        self.segment_path = frames_dir / SEGMENT_NAME
+        index_path = frames_dir / INDEX_NAME
+        raw = index_path.read_bytes() if index_path.exists() else b""
+        usable = len(raw) - len(raw) % _RECORD.size
+        self._records = list(_RECORD.iter_unpack(raw[:usable]))
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        if self._records:
+            self._file = open(self.segment_path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> "FrameSegment":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, i: int) -> bytes:
+        offset, length, _, _ = self._records[i]
+        return self._map[offset:offset + length]
+
+    def __iter__(self) -> Iterator[bytes]:
+        return (self[i] for i in range(len(self)))
+
+    def ext(self, i: int) -> str:
+        return self._records[i][3].rstrip(b"\0").decode()
+
+    def span(self, i: int) -> tuple:
+        """``(start, end)`` byte range of frame *i* inside the segment file."""
+        offset, length, _, _ = self._records[i]
+        return offset, offset + length
+
+    def times(self) -> List[Optional[float]]:
+        """Arrival time of each frame in seconds since run start, or None."""
+        return [None if math.isnan(t) else t for _, _, t, _ in self._records]
+
+    def export(self, out_dir: Path, indices: Optional[Iterable[int]] = None) -> List[Path]:
+        """Write frames out as ``frame_NNNN.<ext>`` files (all by default)."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for i in (range(len(self)) if indices is None else indices):
+            path = out_dir / f"frame_{i:04d}.{self.ext(i)}"
+            path.write_bytes(self[i])
+            paths.append(path)
+        return paths
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export frames from a run's frame container.")
+    parser.add_argument("frames_dir", type=Path, help="the run's frames/ directory")
+    parser.add_argument("--out", type=Path, required=True, help="directory to write images into")
+    parser.add_argument("-i", "--index", type=int, action="append", help="frame index (repeatable)")
+    args = parser.parse_args(argv)
+
+    with FrameSegment(args.frames_dir) as segment:
+        for path in segment.export(args.out, args.index):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
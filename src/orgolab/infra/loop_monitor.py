@@ -0,0 +1,78 @@
+"""
+Event-loop lag monitor.
+
+A heartbeat coroutine stamps the time every ``interval`` seconds; a watchdog
+thread notices when the stamp goes stale and logs the loop thread's stack
+*while* it is blocked, so the offending call shows up in the log.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+log = logging.getLogger("orgolab.loop")
+
+
+class LoopLagMonitor:
+    def __init__(self, threshold: float = 0.1, interval: Optional[float] = None) -> None:
+        self.threshold = threshold
+        self.interval = interval or threshold / 2
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside it)."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            self.max_lag = max(self.max_lag, lag)
+            self._beat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            stalled_for = time.monotonic() - beat - self.interval
+            if stalled_for < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat   # one report per stall
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>\n"
+            log.warning(
+                "event loop blocked for %.0f ms (threshold %.0f ms); loop thread stack:\n%s",
+                stalled_for * 1000, self.threshold * 1000, stack,
+            )
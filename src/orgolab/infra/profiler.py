@@ -0,0 +1,98 @@
+"""
+Opt-in sampling profiler for a single run.
+
+A daemon thread snapshots the stacks of the threads doing the run's work
+(the event-loop thread and its prompt thread) and writes them as collapsed
+stacks and a speedscope JSON profile.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Callable, Dict, List, Optional, Tuple
+
+COLLAPSED_NAME = "profile.collapsed.txt"
+SPEEDSCOPE_NAME = "profile.speedscope.json"
+
+Frame = Tuple[str, str, int]   # (function, file, first line)
+
+
+def _stack(frame: Optional[FrameType]) -> List[Frame]:
+    stack: List[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()   # root first
+    return stack
+
+
+class SamplingProfiler:
+    def __init__(self, threads: Callable[[], Dict[str, Optional[int]]], interval: float = 0.005) -> None:
+        """*threads* returns ``{label: thread ident}`` and is re-read per sample."""
+        self.threads = threads
+        self.interval = interval
+        self.samples: List[Tuple[Frame, ...]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="run-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _sample(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for label, ident in self.threads().items():
+                frame = frames.get(ident) if ident is not None else None
+                if frame is None:
+                    continue
+                self.samples.append(((f"thread:{label}", "", 0), *_stack(frame)))
+                self.weights.append(now - last)
+            last = now
+            del frames
+
+    def write(self, run_dir: Path) -> List[str]:
+        """Write both profile formats into *run_dir*; return their filenames."""
+        collapsed: Counter = Counter()
+        for stack in self.samples:
+            collapsed[";".join(
+                f"{name} ({Path(file).name}:{line})" if file else name for name, file, line in stack
+            )] += 1
+        (run_dir / COLLAPSED_NAME).write_text(
+            "".join(f"{stack} {count}\n" for stack, count in collapsed.most_common())
+        )
+
+        index: Dict[Frame, int] = {}
+        samples = [[index.setdefault(f, len(index)) for f in stack] for stack in self.samples]
+        speedscope = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "orgolab",
+            "name": run_dir.name,
+            "shared": {
+                "frames": [{"name": name, "file": file, "line": line} for name, file, line in index]
+            },
+            "profiles": [{
+                "type": "sampled",
+                "name": run_dir.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.weights),
+                "samples": samples,
+                "weights": self.weights,
+            }],
+        }
+        (run_dir / SPEEDSCOPE_NAME).write_text(json.dumps(speedscope))
+        return [COLLAPSED_NAME, SPEEDSCOPE_NAME]
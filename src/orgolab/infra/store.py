@@ -1,34 +1,72 @@
 import asyncio
-from typing import Dict, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
-from orgolab.domain.models import Run
+from orgolab.domain.models import Batch, Run
 
 runs: Dict[UUID, Run] = {}
+batches: Dict[UUID, Batch] = {}
 _lock = asyncio.Lock()
 
 
+def _new_run(url: str, spf: float, batch_id: Optional[UUID] = None, **kwargs) -> Run:
+    return Run(
+        id=uuid4(),
+        target_url=url,
+        status="PENDING",
+        seconds_per_frame=spf,
+        intent=kwargs.get("intent"),
+        success=kwargs.get("success"),
+        context=kwargs.get("context"),
+        batch_id=batch_id,
+        profile=kwargs.get("profile", False),
+    )
+
+
 async def create_run(url: str, *, spf: float = 0.1, **kwargs) -> Run:
     async with _lock:
-        run = Run(
-            id=uuid4(),
-            target_url=url,
-            status="PENDING",
-            seconds_per_frame=spf,
-            intent=kwargs.get("intent"),
-            success=kwargs.get("success"),
-            context=kwargs.get("context"),
-        )
+        run = _new_run(url, spf, **kwargs)
         runs[run.id] = run
         return run
 
 
+async def create_batch(
+    specs: List[Dict[str, Any]], *, max_per_origin: int
+) -> Tuple[Batch, List[Run]]:
+    """Create every run of a batch under a single lock acquisition.
+
+    Each spec takes the same keys as ``create_run`` (``url``, ``spf``, ...).
+    """
+    async with _lock:
+        batch_id = uuid4()
+        new_runs = [_new_run(batch_id=batch_id, **spec) for spec in specs]
+        batch = Batch(
+            id=batch_id,
+            run_ids=[run.id for run in new_runs],
+            max_per_origin=max_per_origin,
+            created_at=datetime.now(timezone.utc),
+        )
+        runs.update((run.id, run) for run in new_runs)
+        batches[batch.id] = batch
+        return batch, new_runs
+
+
 async def get_run(run_id: UUID) -> Optional[Run]:
     # No lock needed for a plain read; dict access is atomic
     # inside a single-threaded asyncio event loop.
     return runs.get(run_id)
 
 
+async def get_runs(run_ids: List[UUID]) -> List[Run]:
+    return [runs[run_id] for run_id in run_ids if run_id in runs]
+
+
+async def get_batch(batch_id: UUID) -> Optional[Batch]:
+    return batches.get(batch_id)
+
+
 async def update_run(run: Run) -> None:
     async with _lock:
+        run.version += 1
         runs[run.id] = run
@@ -0,0 +1,69 @@
+"""Local stand-in for the model API, for driving the LLM limiter on a fake clock."""
+
+import collections
+from typing import Any, Deque, Dict, Optional
+
+from orgolab.core.rate_limit import TokenBucket, call_with_backoff
+
+
+class FakeClock:
+    """Monotonic clock that only moves when something sleeps on it."""
+
+    def __init__(self, start: float = 1000.0) -> None:
+        self.now = start
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class _Response:
+    def __init__(self, headers: Dict[str, str]) -> None:
+        self.headers = headers
+
+
+class StubRateLimitError(Exception):
+    """Shaped like anthropic's RateLimitError: status 429 plus response headers."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__("429 rate limited (stub)")
+        headers = {} if retry_after is None else {"retry-after": f"{retry_after:g}"}
+        self.response = _Response(headers)
+
+
+class StubProvider:
+    """Accepts at most *per_minute* calls in any sliding 60 s window.
+
+    Calls over the limit raise ``StubRateLimitError`` with a retry-after
+    header saying when the oldest call leaves the window.
+    """
+
+    def __init__(self, per_minute: int, clock: FakeClock) -> None:
+        self.per_minute = per_minute
+        self.clock = clock
+        self.accepted: Deque[float] = collections.deque()
+        self.calls = 0
+        self.rejected = 0
+
+    def __call__(self, *args: Any, **kwargs: Any) -> str:
+        now = self.clock()
+        while self.accepted and self.accepted[0] <= now - 60:
+            self.accepted.popleft()
+        if len(self.accepted) >= self.per_minute:
+            self.rejected += 1
+            raise StubRateLimitError(retry_after=self.accepted[0] + 60 - now)
+        self.accepted.append(now)
+        self.calls += 1
+        return "ok"
+
+
+def simulate(limiter: TokenBucket, provider: StubProvider, calls: int, **backoff: Any) -> None:
+    """Make *calls* model calls through ``call_with_backoff`` against *provider*."""
+    for _ in range(calls):
+        call_with_backoff(provider, limiter=limiter, **backoff)
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+from llm_stub import FakeClock, StubProvider, StubRateLimitError, simulate
+
+from orgolab.core.rate_limit import TokenBucket, call_with_backoff
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda a, b: 0.0)
+
+
+def bucket(clock, per_minute=60, burst=1):
+    return TokenBucket(per_minute, burst, clock=clock, sleep=clock.sleep)
+
+
+def failing(times, retry_after=None):
+    """Callable that raises a rate-limit error *times* times, then succeeds."""
+    calls = []
+
+    def fn():
+        calls.append(None)
+        if len(calls) <= times:
+            raise StubRateLimitError(retry_after)
+        return "ok"
+
+    fn.calls = calls
+    return fn
+
+
+def test_retry_allowed(clock):
+    limiter = bucket(clock)
+    fn = failing(1)
+    assert call_with_backoff(fn, limiter=limiter, base_delay=2.0) == "ok"
+    assert len(fn.calls) == 2
+    assert limiter.rate_limit_errors == 1
+
+
+def test_retry_refused_still_pauses_everyone(clock):
+    limiter = bucket(clock, per_minute=0)
+    fn = failing(1)
+    with pytest.raises(StubRateLimitError):
+        call_with_backoff(fn, limiter=limiter, can_retry=lambda: False, base_delay=2.0)
+    assert len(fn.calls) == 1
+    # The next caller waits out the shared pause
+    assert limiter.acquire() == pytest.approx(2.0)
+
+
+def test_retry_after_honoured(clock):
+    limiter = bucket(clock, per_minute=0)
+    fn = failing(1, retry_after=7)
+    waits = []
+    call_with_backoff(fn, limiter=limiter, base_delay=2.0, on_wait=waits.append)
+    assert sum(waits) >= 7
+    assert clock.now - 1000.0 >= 7
+
+
+def test_gives_up_after_max_retries(clock):
+    limiter = bucket(clock, per_minute=0)
+    fn = failing(10)
+    with pytest.raises(StubRateLimitError):
+        call_with_backoff(fn, limiter=limiter, max_retries=2)
+    assert len(fn.calls) == 3
+
+
+def test_other_errors_are_not_retried(clock):
+    limiter = bucket(clock)
+
+    def fn():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        call_with_backoff(fn, limiter=limiter)
+    assert limiter.rate_limit_errors == 0
+
+
+def test_acquire_terminates_on_rounding_residue():
+    # 1 - 4e-16 tokens: the computed wait is too small to move the clock
+    clock = FakeClock(start=1000.0)
+    limiter = bucket(clock, per_minute=60)
+    limiter._tokens = 0.9999999999999996
+
+    def sleep(seconds):
+        if len(clock.sleeps) > 100:
+            pytest.fail("acquire() is spinning")
+        clock.sleep(seconds)
+
+    limiter.acquire(sleep)
+    assert len(clock.sleeps) < 3
+
+
+def test_limiter_keeps_stub_provider_under_its_limit(clock):
+    limiter = bucket(clock, per_minute=30, burst=5)
+    # A bucket may spend its burst on top of a full minute's refill
+    provider = StubProvider(per_minute=30 + 5, clock=clock)
+    simulate(limiter, provider, calls=90)
+    assert provider.calls == 90
+    assert provider.rejected == 0
+    # 90 calls at 30/min, less the initial burst
+    assert clock.now - 1000.0 == pytest.approx((90 - 5) * 2.0)
+
+
+def test_limiter_backs_off_when_provider_is_stricter(clock):
+    limiter = bucket(clock, per_minute=60, burst=5)
+    provider = StubProvider(per_minute=20, clock=clock)
+    simulate(limiter, provider, calls=40, max_retries=5)
+    assert provider.calls == 40
+    assert provider.rejected > 0
+    assert limiter.rate_limit_errors == provider.rejected
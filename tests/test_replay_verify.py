@@ -0,0 +1,81 @@
+import ast
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from orgolab.core.replay.orgo import generate_orgo_script
+from orgolab.core.replay.verify import dhash, verify_replay
+
+
+def screen(k: int) -> Image.Image:
+    """A distinct synthetic 'screen' per *k*: a white bar at a different offset."""
+    im = Image.new("RGB", (320, 240), "black")
+    ImageDraw.Draw(im).rectangle([k * 40, 0, k * 40 + 60, 240], fill="white")
+    return im
+
+
+def noise(seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    return Image.frombytes("RGB", (64, 48), bytes(rng.randrange(256) for _ in range(64 * 48 * 3)))
+
+
+def template_dhash(tmp_path):
+    """The dhash function exactly as it appears in a generated orgo_replay.py."""
+    script = (tmp_path / generate_orgo_script(tmp_path, "actions.json")).read_text()
+    func = next(
+        node for node in ast.parse(script).body
+        if isinstance(node, ast.FunctionDef) and node.name == "dhash"
+    )
+    namespace = {"Image": Image}
+    exec(compile(ast.Module(body=[func], type_ignores=[]), "orgo_replay.py", "exec"), namespace)
+    return namespace["dhash"]
+
+
+@pytest.mark.parametrize("image", [screen(0), screen(3), noise(1), noise(2), Image.new("L", (8, 8))])
+def test_generated_script_dhash_matches_verify(tmp_path, image):
+    assert template_dhash(tmp_path)(image) == dhash(image)
+
+
+class FakePC:
+    """Screen changes only on the 'key' action, like Enter submitting a form."""
+
+    def __init__(self) -> None:
+        self.page = 0
+        self.calls = []
+
+    def __getattr__(self, name):
+        def act(**kwargs):
+            self.calls.append(name)
+            if name == "key":
+                self.page += 1
+        return act
+
+    def screenshot(self):
+        return screen(self.page)
+
+
+STEPS = [{"name": "left_click"}, {"name": "type"}, {"name": "key"}, {"name": "left_click"}, {"name": "key"}]
+
+
+def timeline(hashes):
+    return {
+        "phash": {"algorithm": "dhash64", "tolerance": 10},
+        "actions": [
+            {"index": i, **({"phash": f"{hashes[i]:016x}"} if i in hashes else {})}
+            for i in range(len(STEPS))
+        ],
+    }
+
+
+def test_verify_replay_matches():
+    tl = timeline({2: dhash(screen(1)), 4: dhash(screen(2))})
+    pc = FakePC()
+    assert verify_replay(pc, STEPS, tl, settle=0) is None
+    assert len(pc.calls) == len(STEPS)
+
+
+def test_verify_replay_reports_first_divergence():
+    tl = timeline({2: dhash(screen(1)), 4: dhash(screen(5))})
+    pc = FakePC()
+    assert verify_replay(pc, STEPS, tl, settle=0, attempts=2) == 4